@@ -1,6 +1,8 @@
 from flask import Flask, render_template, g
-from db.fluiddbinterface import VerificationDB
+from flask.json.provider import DefaultJSONProvider
+from db.fluiddbinterface import VerificationDB, int_to_ym
 import os
+import sqlite3
 
 # Get the directory where app.py is located
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -8,13 +10,27 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # Path to your existing SQLite file (relative to app.py)
 DB_PATH = os.path.join(BASE_DIR, 'db', 'fluid.db')
 
+class RowJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that also serializes sqlite3.Row objects (as dicts).
+    Lets views pass fetched rows straight to |tojson without copying them first.
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, sqlite3.Row):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
+
+
 def get_db() -> VerificationDB:
     """
     Get database connection for current request context.
-    Uses Flask's g object to store one connection per request.
+    Uses Flask's g object to store one connection per request; the
+    underlying sqlite3 connection comes from (and returns to) a pool.
     """
     if 'db' not in g:
-        g.db = VerificationDB(DB_PATH)
+        g.db = VerificationDB(DB_PATH, pooled=True)
         g.db.connect()
     return g.db
 
@@ -25,6 +41,7 @@ def create_app() -> Flask:
     Sets up database, blueprints, and routes.
     """
     app = Flask(__name__)
+    app.json = RowJSONProvider(app)
 
     # Secret key for session management (needed for flash messages)
     app.secret_key = 'dev-secret-key-change-in-production'
@@ -37,6 +54,23 @@ def create_app() -> Flask:
         db = VerificationDB(DB_PATH)
         db.connect()
 
+        # Usage counters read by every item list page: without them those pages
+        # cannot render, so a failure here stops startup instead of warning
+        db.ensure_loading_summary()
+
+        # WAL journaling and indexes only speed things up; each step warns
+        # on failure and startup continues
+        try:
+            db.enable_wal()
+        except Exception as e:
+            print(f"Startup database setup warning (WAL): {e}")
+        try:
+            for index_name in db.ensure_indexes():
+                print(f"Startup database setup warning: duplicate rows kept {index_name} "
+                      "from being created; writes that rely on it use a lookup instead")
+        except Exception as e:
+            print(f"Startup database setup warning (indexes): {e}")
+
         # Ensure PRODUCT type and UNALLOCATED product exist
         try:
             product_type_id = db.get_itemtype_id_by_typename('PRODUCT')
@@ -58,6 +92,9 @@ def create_app() -> Flask:
     # Make get_db function accessible
     app.config['GET_DB'] = get_db
 
+    # Render integer YYYYMM month keys back to 'YYYY-MM' in templates
+    app.add_template_filter(int_to_ym, 'ym')
+
     @app.teardown_appcontext
     def close_db(error):
         """
@@ -1,15 +1,10 @@
 from flask import Blueprint, render_template, request, jsonify
 import json
+from app import get_db
 
 bp = Blueprint('ai_query', __name__)
 
 
-def get_db():
-    """Get database connection for current request."""
-    from app import get_db as app_get_db
-    return app_get_db()
-
-
 @bp.get('/')
 def query_interface():
     """Display the AI query interface."""
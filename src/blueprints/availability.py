@@ -1,16 +1,11 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from datetime import datetime
 import json
+from app import get_db
 
 bp = Blueprint('availability', __name__)
 
 
-def get_db():
-    """Get database connection for current request."""
-    from app import get_db as app_get_db
-    return app_get_db()
-
-
 @bp.get('/')
 def analytics():
     """
@@ -5,16 +5,11 @@ This creates a "requirements profile" that can be compared against actual item a
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from datetime import datetime
+from app import get_db
 
 bp = Blueprint('product_loading', __name__, url_prefix='/product-loading')
 
 
-def get_db():
-    """Get database connection for current request."""
-    from app import get_db as app_get_db
-    return app_get_db()
-
-
 @bp.get('/view/<int:product_id>')
 def view_product_loading(product_id):
     """
@@ -24,19 +19,18 @@ def view_product_loading(product_id):
     db = get_db()
 
     # Get product details
-    product = db.get_item_by_id(product_id)
+    product = db.get_item_with_type(product_id)
     if not product:
         flash('Product not found.', 'danger')
         return redirect(url_for('products.list_products'))
 
     # Verify it's a product
-    product_type = db.get_itemtype_by_id(product['fkitemtype'])
-    if not product_type or product_type['typename'] != 'PRODUCT':
+    if product['typename'] != 'PRODUCT':
         flash('Item is not a product.', 'danger')
         return redirect(url_for('products.list_products'))
 
     # Get product loading requirements for this product
-    product_loadings = db.list_product_loadings_for_product(product_id)
+    product_loadings = db.iter_product_loadings_for_product(product_id)
 
     # Organize by month
     monthly_data = {}
@@ -68,14 +62,13 @@ def edit_form(product_id):
     db = get_db()
 
     # Get product details
-    product = db.get_item_by_id(product_id)
+    product = db.get_item_with_type(product_id)
     if not product:
         flash('Product not found.', 'danger')
         return redirect(url_for('products.list_products'))
 
     # Verify it's a product
-    product_type = db.get_itemtype_by_id(product['fkitemtype'])
-    if not product_type or product_type['typename'] != 'PRODUCT':
+    if product['typename'] != 'PRODUCT':
         flash('Item is not a product.', 'danger')
         return redirect(url_for('products.list_products'))
 
@@ -84,7 +77,7 @@ def edit_form(product_id):
     item_types = [it for it in all_itemtypes if it['typename'] != 'PRODUCT']
 
     # Get existing product loading requirements
-    product_loadings = db.list_product_loadings_for_product(product_id)
+    product_loadings = db.iter_product_loadings_for_product(product_id)
 
     # Build a matrix: loading_matrix[month][typename] = {percent, notes, id}
     loading_matrix = {}
@@ -266,14 +259,13 @@ def enhanced_allocation_interface(product_id):
     db = get_db()
 
     # Get product details
-    product = db.get_item_by_id(product_id)
+    product = db.get_item_with_type(product_id)
     if not product:
         flash('Product not found.', 'danger')
         return redirect(url_for('products.list_products'))
 
     # Verify it's a product
-    product_type = db.get_itemtype_by_id(product['fkitemtype'])
-    if not product_type or product_type['typename'] != 'PRODUCT':
+    if product['typename'] != 'PRODUCT':
         flash('Item is not a product.', 'danger')
         return redirect(url_for('products.list_products'))
 
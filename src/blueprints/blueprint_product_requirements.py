@@ -11,16 +11,11 @@ to identify gaps and overallocations.
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from datetime import datetime
+from app import get_db
 
 bp = Blueprint('product_requirements', __name__, url_prefix='/product-requirements')
 
 
-def get_db():
-    """Get database connection for current request."""
-    from app import get_db as app_get_db
-    return app_get_db()
-
-
 @bp.get('/view/<int:product_id>')
 def view_product_requirements(product_id):
     """
@@ -30,19 +25,18 @@ def view_product_requirements(product_id):
     db = get_db()
 
     # Get product details
-    product = db.get_item_by_id(product_id)
+    product = db.get_item_with_type(product_id)
     if not product:
         flash('Product not found.', 'danger')
         return redirect(url_for('products.list_products'))
 
     # Verify it's a product
-    product_type = db.get_itemtype_by_id(product['fkitemtype'])
-    if not product_type or product_type['typename'] != 'PRODUCT':
+    if product['typename'] != 'PRODUCT':
         flash('Item is not a product.', 'danger')
         return redirect(url_for('products.list_products'))
 
     # Get product requirements for this product
-    product_requirements = db.list_product_requirements_for_product(product_id)
+    product_requirements = db.iter_product_requirements_for_product(product_id)
 
     # Organize by month
     monthly_data = {}
@@ -74,14 +68,13 @@ def edit_form(product_id):
     db = get_db()
 
     # Get product details
-    product = db.get_item_by_id(product_id)
+    product = db.get_item_with_type(product_id)
     if not product:
         flash('Product not found.', 'danger')
         return redirect(url_for('products.list_products'))
 
     # Verify it's a product
-    product_type = db.get_itemtype_by_id(product['fkitemtype'])
-    if not product_type or product_type['typename'] != 'PRODUCT':
+    if product['typename'] != 'PRODUCT':
         flash('Item is not a product.', 'danger')
         return redirect(url_for('products.list_products'))
 
@@ -94,7 +87,7 @@ def edit_form(product_id):
     all_months = [f"{current_year}-{str(m).zfill(2)}" for m in range(1, 13)]
 
     # Get existing requirements for this product
-    existing_requirements = db.list_product_requirements_for_product(product_id)
+    existing_requirements = db.iter_product_requirements_for_product(product_id)
 
     # Organize by month and item
     requirements_matrix = {}
@@ -211,14 +204,13 @@ def enhanced_requirements_interface(product_id):
     db = get_db()
 
     # Get product details
-    product = db.get_item_by_id(product_id)
+    product = db.get_item_with_type(product_id)
     if not product:
         flash('Product not found.', 'danger')
         return redirect(url_for('products.list_products'))
 
     # Verify it's a product
-    product_type = db.get_itemtype_by_id(product['fkitemtype'])
-    if not product_type or product_type['typename'] != 'PRODUCT':
+    if product['typename'] != 'PRODUCT':
         flash('Item is not a product.', 'danger')
         return redirect(url_for('products.list_products'))
 
@@ -0,0 +1,282 @@
+from collections import Counter
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+
+from app import get_db
+from db.fluiddbinterface import DuplicateItemNameError
+
+
+# An item's loadings summed per month and product for the usage page;
+# record_count lets the view count the underlying records per product.
+_QUERY_USAGE_DETAILS = '''
+    WITH il_f AS (
+        SELECT fkproduct, monthyear, percent
+        FROM itemloading
+        WHERE fkitem = ?
+    )
+    SELECT
+        il_f.monthyear,
+        COALESCE(p.itemname, 'UNALLOCATED') AS productname,
+        SUM(il_f.percent) AS percent,
+        il_f.fkproduct,
+        COUNT(*) AS record_count
+    FROM il_f
+    LEFT JOIN items p ON il_f.fkproduct = p.id
+    GROUP BY il_f.monthyear, il_f.fkproduct
+    ORDER BY il_f.monthyear, p.itemname
+'''
+
+
+def make(name, typename, uppercase=True, product_side=False, reserved=()):
+    """
+    Build the list/add/edit/delete blueprint for one item type.
+
+    name is the URL prefix and template prefix ('resources'); the singular
+    ('resource') names the form field, template variable and endpoints.
+    product_side counts mappings/loadings on fkproduct instead of fkitem.
+    Items whose name is in reserved cannot be deleted.
+    Item-side types also get the /usage/<id> view.
+    """
+    bp = Blueprint(name, __name__)
+    singular = name[:-1]
+    noun = singular.capitalize()
+    field = f'{singular}name'
+    fk = 'fkproduct' if product_side else 'fkitem'
+    mapped_col = 'mapped_items' if product_side else 'mapped_products'
+    mapped_label = 'item' if product_side else 'product'
+    summary_prefix = 'product_' if product_side else ''
+
+    def list_url():
+        return url_for(f'{name}.list_{name}')
+
+    def add_url():
+        return url_for(f'{name}.add_form')
+
+    def read_name():
+        itemname = request.form[field].strip()
+        return itemname.upper() if uppercase else itemname
+
+    # Usage counts are maintained in loading_summary. Rows are namedtuples;
+    # the list templates read them as attributes.
+    list_query = f'''
+        SELECT
+            i.id,
+            i.itemname,
+            COALESCE(ls.{summary_prefix}mapped_count, 0) as {mapped_col},
+            COALESCE(ls.{summary_prefix}loading_count, 0) as loading_count
+        FROM items i
+        JOIN itemtypes it ON i.fkitemtype = it.id
+        LEFT JOIN loading_summary ls ON ls.fkitem = i.id
+        WHERE it.typename = ?
+        ORDER BY i.itemname
+    '''
+
+    def list_items():
+        """Display all items of this type with usage statistics."""
+        db = get_db()
+        rows = db._execute_tuples(list_query, (typename,)).fetchall()
+        return render_template(f'{name}_list.html', **{name: rows})
+
+    def add_form():
+        """Display form to add a new item."""
+        return render_template(f'{name}_add.html')
+
+    def add_item():
+        """
+        Process form submission to add a new item.
+        Creates an item with this blueprint's type.
+        """
+        db = get_db()
+
+        try:
+            itemname = read_name()
+
+            if not itemname:
+                flash(f'{noun} name is required.', 'warning')
+                return redirect(add_url())
+
+            # Get or create the type (id is cached after first lookup)
+            type_id = db.get_or_create_itemtype_id(typename)
+
+            # add_item rejects a taken name (unique index, or a lookup on legacy data)
+            try:
+                item_id = db.add_item(itemname, type_id)
+            except DuplicateItemNameError:
+                db.con.rollback()
+                flash(f'{noun} "{itemname}" already exists.', 'warning')
+                return redirect(add_url())
+            db.con.commit()
+
+            flash(f'{noun} "{itemname}" added successfully with ID {item_id}.', 'success')
+            return redirect(list_url())
+
+        except Exception as e:
+            db.con.rollback()
+            flash(f'Error adding {singular}: {e}', 'danger')
+
+        return redirect(add_url())
+
+    def edit_form(id):
+        """
+        Display form to edit an existing item.
+        Shows current name pre-filled.
+        """
+        db = get_db()
+
+        item = db.get_item_with_type(id)
+        if not item:
+            flash(f'{noun} not found.', 'danger')
+            return redirect(list_url())
+
+        if item['typename'] != typename:
+            flash(f'This item is not a {singular}.', 'danger')
+            return redirect(list_url())
+
+        return render_template(f'{name}_edit.html', **{singular: item})
+
+    def edit_item(id):
+        """
+        Process form submission to update an existing item.
+        Validates new name for uniqueness.
+        """
+        db = get_db()
+
+        try:
+            itemname = read_name()
+
+            if not itemname:
+                flash(f'{noun} name is required.', 'warning')
+                return redirect(url_for(f'{name}.edit_form', id=id))
+
+            current = db.get_item_by_id(id)
+            if not current:
+                flash(f'{noun} not found.', 'danger')
+                return redirect(list_url())
+
+            # Unchanged name (plain "Save"): nothing to check or write
+            if current['itemname'] != itemname:
+                # update_item rejects a taken name (unique index, or a lookup on legacy data)
+                try:
+                    db.update_item(id, itemname=itemname)
+                except DuplicateItemNameError:
+                    db.con.rollback()
+                    flash(f'{noun} "{itemname}" already exists.', 'warning')
+                    return redirect(url_for(f'{name}.edit_form', id=id))
+                db.con.commit()
+
+            flash(f'{noun} "{itemname}" updated successfully.', 'success')
+            return redirect(list_url())
+
+        except Exception as e:
+            db.con.rollback()
+            flash(f'Error updating {singular}: {e}', 'danger')
+
+        return redirect(url_for(f'{name}.edit_form', id=id))
+
+    # Each probe stops at the first matching row
+    in_use_query = f'''
+        SELECT
+            EXISTS(SELECT 1 FROM item_product_map WHERE {fk} = ?) as has_mappings,
+            EXISTS(SELECT 1 FROM itemloading WHERE {fk} = ?) as has_loadings
+    '''
+    usage_query = f'''
+        SELECT
+            (SELECT COUNT(*) FROM item_product_map WHERE {fk} = ?) as mapped_count,
+            (SELECT COUNT(*) FROM itemloading WHERE {fk} = ?) as loading_count
+    '''
+
+    def delete_item(id):
+        """
+        Delete an item.
+        Checks if the item is in use before deletion.
+        """
+        db = get_db()
+
+        try:
+            item = db.get_item_by_id(id)
+            if not item:
+                flash(f'{noun} not found.', 'danger')
+                return redirect(list_url())
+
+            itemname = item['itemname']
+
+            if itemname in reserved:
+                flash(f'Cannot delete the {itemname} {singular} (system reserved).', 'danger')
+                return redirect(list_url())
+
+            in_use = db._execute(in_use_query, (id, id)).fetchone()
+            if in_use['has_mappings'] or in_use['has_loadings']:
+                # Count only when the numbers are needed for the message
+                usage = db._execute(usage_query, (id, id)).fetchone()
+                flash(
+                    f'Cannot delete "{itemname}": '
+                    f'{usage["mapped_count"]} {mapped_label} mapping(s) and '
+                    f'{usage["loading_count"]} loading record(s) exist.',
+                    'danger'
+                )
+                return redirect(list_url())
+
+            db.delete_item(id)
+            db.con.commit()
+
+            flash(f'{noun} "{itemname}" deleted successfully.', 'success')
+
+        except Exception as e:
+            db.con.rollback()
+            flash(f'Error deleting {singular}: {e}', 'danger')
+
+        return redirect(list_url())
+
+    def view_usage(id):
+        """
+        View which products this item is working on.
+        Shows the item-product relationships and detailed loading statistics.
+        """
+        db = get_db()
+
+        item = db.get_item_by_id(id)
+        if not item:
+            flash(f'{noun} not found.', 'danger')
+            return redirect(list_url())
+
+        loading_details_rows = db._execute(_QUERY_USAGE_DETAILS, (id,)).fetchall()
+
+        # Products that this item has loading records for (actual usage)
+        loading_counts = Counter()
+        for row in loading_details_rows:
+            loading_counts[row['fkproduct']] += row['record_count']
+        names_by_id = {row['fkproduct']: row['productname'] for row in loading_details_rows}
+        mapped_products = sorted(
+            (
+                {'id': product_id, 'itemname': names_by_id[product_id], 'loading_count': count}
+                for product_id, count in loading_counts.items()
+                if product_id is not None
+            ),
+            key=lambda product: product['itemname'],
+        )
+
+        # Loading statistics with monthly breakdown
+        loading_stats = {
+            'total_records': sum(loading_counts.values()),
+            'total_percent': sum(row['percent'] for row in loading_details_rows),
+            'month_count': len({row['monthyear'] for row in loading_details_rows}),
+        }
+
+        return render_template(
+            f'{name}_usage.html',
+            mapped_products=mapped_products,
+            loading_stats=loading_stats,
+            loading_details=loading_details_rows,
+            **{singular: item}
+        )
+
+    bp.add_url_rule('/', f'list_{name}', list_items, methods=['GET'])
+    bp.add_url_rule('/add', 'add_form', add_form, methods=['GET'])
+    bp.add_url_rule('/add', f'add_{singular}', add_item, methods=['POST'])
+    bp.add_url_rule('/edit/<int:id>', 'edit_form', edit_form, methods=['GET'])
+    bp.add_url_rule('/edit/<int:id>', f'edit_{singular}', edit_item, methods=['POST'])
+    bp.add_url_rule('/delete/<int:id>', f'delete_{singular}', delete_item, methods=['POST'])
+    if not product_side:
+        bp.add_url_rule('/usage/<int:id>', 'view_usage', view_usage, methods=['GET'])
+
+    return bp
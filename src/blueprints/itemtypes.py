@@ -1,14 +1,9 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
+from app import get_db
 
 bp = Blueprint('itemtypes', __name__)
 
 
-def get_db():
-    """Get database connection for current request."""
-    from app import get_db as app_get_db
-    return app_get_db()
-
-
 @bp.get('/')
 def list_types():
     """
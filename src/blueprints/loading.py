@@ -1,15 +1,11 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, stream_template, request, redirect, url_for, flash, get_flashed_messages
 from datetime import datetime
+from db.fluiddbinterface import ym_to_int
+from app import get_db
 
 bp = Blueprint('loading', __name__)
 
 
-def get_db():
-    """Get database connection for current request."""
-    from app import get_db as app_get_db
-    return app_get_db()
-
-
 @bp.get('/')
 def grid_selector():
     """
@@ -94,23 +90,32 @@ def grid_edit():
         start_month = all_months[0]
         end_month = all_months[-1]
 
+    # Grid cells are keyed by integer YYYYMM months (rendered with |ym)
+    all_months = [ym_to_int(m) for m in all_months]
+
     # Get all products
     products = db.list_products()
 
     # Ensure UNALLOCATED exists
-    unallocated_id = db.get_or_create_unallocated_product()
+    unallocated_id = db.get_or_create_unallocated_product(commit=True)
     if not any(p['id'] == unallocated_id for p in products):
         products = list(db.list_products())
 
     # Get existing loading data for selected items
     loadings = db.get_loadings_for_items(selected_ids)
 
-    return render_template(
+    # Pop pending flash messages now: the session cookie is written before a
+    # streamed body starts, so popping them mid-stream would not persist.
+    get_flashed_messages(with_categories=True)
+
+    # Stream the grid (items x months x products cells) so the browser can
+    # start painting rows before the whole document is rendered.
+    return stream_template(
         'loading_grid_products.html',
         items=items,
         all_months=all_months,
         products=products,
-        selected_ids=selected_ids,
+        selected_ids=set(selected_ids),  # membership-tested per item in the template
         editing=True,
         loadings=loadings,
         unallocated_id=unallocated_id,
@@ -131,6 +136,7 @@ def grid_save():
     updates = 0
     deletes = 0
     errors = []
+    upserts = []
 
     # Parse all form fields that start with "percent-"
     for key, value in request.form.items():
@@ -155,6 +161,7 @@ def grid_save():
                 continue
 
             item_id_str = remainder[:first_hyphen_idx]
+            # Stored as-is (the form renders it with |ym); the monthyear CHECK validates it
             monthyear = remainder[first_hyphen_idx + 1:]
 
             # Parse IDs
@@ -198,16 +205,17 @@ def grid_save():
                 errors.append(f'Invalid percent {percent}% for item {item_id}, month {monthyear}')
                 continue
 
-            # Upsert the loading value (only for non-zero values)
-            db.upsert_loading(item_id, monthyear, percent, product_id)
+            # Upsert the loading value (only for non-zero values), batched below
+            upserts.append((item_id, monthyear, percent, product_id))
             updates += 1
 
         except (ValueError, IndexError) as e:
             errors.append(f'Error parsing {key}: {e}')
             continue
 
-    # Commit all changes
+    # Write all upserts in one executemany and commit
     try:
+        db.upsert_loadings_bulk(upserts)
         db.con.commit()
 
         # Build success message
@@ -1,13 +1,52 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from collections import Counter
 
-bp = Blueprint('units', __name__)
+from flask import Blueprint, render_template, request, redirect, url_for, flash
 
+from app import get_db
+from db.fluiddbinterface import DuplicateItemNameError
 
-def get_db():
-    """Get database connection for current request."""
-    from app import get_db as app_get_db
-    return app_get_db()
+bp = Blueprint('units', __name__)
 
+# Units with usage counts (maintained in loading_summary)
+_QUERY_UNITS_LIST = '''
+    SELECT 
+        i.id, 
+        i.itemname,
+        COALESCE(ls.mapped_count, 0) as mapped_products,
+        COALESCE(ls.loading_count, 0) as loading_count
+    FROM items i
+    JOIN itemtypes it ON i.fkitemtype = it.id
+    LEFT JOIN loading_summary ls ON ls.fkitem = i.id
+    WHERE it.typename = 'UNIT'
+    ORDER BY i.itemname
+'''
+
+# Whether a unit is in use (each probe stops at the first matching row)
+_QUERY_UNIT_IN_USE = '''
+    SELECT 
+        EXISTS(SELECT 1 FROM item_product_map WHERE fkitem = ?) as has_products,
+        EXISTS(SELECT 1 FROM itemloading WHERE fkitem = ?) as has_loadings
+'''
+
+# Usage counts for the "Cannot delete" message
+_QUERY_UNIT_USAGE_COUNTS = '''
+    SELECT 
+        (SELECT COUNT(*) FROM item_product_map WHERE fkitem = ?) as mapped_products,
+        (SELECT COUNT(*) FROM itemloading WHERE fkitem = ?) as loading_count
+'''
+
+# Detailed loading records for a unit (chart, table, product list and stats)
+_QUERY_USAGE_DETAILS = '''
+    SELECT 
+        il.monthyear,
+        COALESCE(p.itemname, 'UNALLOCATED') AS productname,
+        il.percent,
+        il.fkproduct
+    FROM itemloading il
+    LEFT JOIN items p ON il.fkproduct = p.id
+    WHERE il.fkitem = ?
+    ORDER BY il.monthyear, p.itemname
+'''
 
 @bp.get('/')
 def list_units():
@@ -16,23 +55,7 @@ def list_units():
     Shows how many products/loadings are associated with each unit.
     """
     db = get_db()
-
-    # Get all units with usage counts
-    units_query = '''
-        SELECT 
-            i.id, 
-            i.itemname,
-            COUNT(DISTINCT ipm.fkproduct) as mapped_products,
-            COUNT(DISTINCT il.id) as loading_count
-        FROM items i
-        JOIN itemtypes it ON i.fkitemtype = it.id
-        LEFT JOIN item_product_map ipm ON i.id = ipm.fkitem
-        LEFT JOIN itemloading il ON i.id = il.fkitem
-        WHERE it.typename = 'UNIT'
-        GROUP BY i.id, i.itemname
-        ORDER BY i.itemname
-    '''
-    units = db._execute(units_query).fetchall()
+    units = db._execute(_QUERY_UNITS_LIST).fetchall()
 
     return render_template('units_list.html', units=units)
 
@@ -60,19 +83,17 @@ def add_unit():
             flash('Unit name is required.', 'warning')
             return redirect(url_for('units.add_form'))
 
-        # Check if unit already exists
-        existing = db.get_item_by_name(unitname)
-        if existing:
+        # Get or create UNIT type (id is cached after first lookup)
+        unit_type_id = db.get_or_create_itemtype_id('UNIT')
+
+        # Add the unit; add_item rejects a taken name (unique index, or a
+        # lookup when legacy duplicates kept the index from being created)
+        try:
+            unit_id = db.add_item(unitname, unit_type_id)
+        except DuplicateItemNameError:
+            db.con.rollback()
             flash(f'Unit "{unitname}" already exists.', 'warning')
             return redirect(url_for('units.add_form'))
-
-        # Get or create UNIT type
-        unit_type_id = db.get_itemtype_id_by_typename('UNIT')
-        if not unit_type_id:
-            unit_type_id = db.add_itemtype('UNIT')
-
-        # Add the unit
-        unit_id = db.add_item(unitname, unit_type_id)
         db.con.commit()
 
         flash(f'Unit "{unitname}" added successfully with ID {unit_id}.', 'success')
@@ -119,17 +140,21 @@ def edit_unit(id):
             flash('Unit name is required.', 'warning')
             return redirect(url_for('units.edit_form', id=id))
 
-        # Check if name is being changed and new name exists
         current_unit = db.get_item_by_id(id)
+        if not current_unit:
+            flash('Unit not found.', 'danger')
+            return redirect(url_for('units.list_units'))
+
+        # Unchanged name (plain "Save"): nothing to check or write
         if current_unit['itemname'] != unitname:
-            existing = db.get_item_by_name(unitname)
-            if existing:
+            # update_item rejects a taken name (unique index, or a lookup on legacy data)
+            try:
+                db.update_item(id, itemname=unitname)
+            except DuplicateItemNameError:
+                db.con.rollback()
                 flash(f'Unit "{unitname}" already exists.', 'warning')
                 return redirect(url_for('units.edit_form', id=id))
-
-        # Update the unit
-        db.update_item(id, unitname, current_unit['fkitemtype'])
-        db.con.commit()
+            db.con.commit()
 
         flash(f'Unit "{unitname}" updated successfully.', 'success')
         return redirect(url_for('units.list_units'))
@@ -159,18 +184,11 @@ def delete_unit(id):
         unitname = unit['itemname']
 
         # Check if unit is in use
-        usage_query = '''
-            SELECT 
-                COUNT(DISTINCT ipm.fkproduct) as mapped_products,
-                COUNT(DISTINCT il.id) as loading_count
-            FROM items i
-            LEFT JOIN item_product_map ipm ON i.id = ipm.fkitem
-            LEFT JOIN itemloading il ON i.id = il.fkitem
-            WHERE i.id = ?
-        '''
-        usage = db._execute(usage_query, (id,)).fetchone()
-
-        if usage['mapped_products'] > 0 or usage['loading_count'] > 0:
+        in_use = db._execute(_QUERY_UNIT_IN_USE, (id, id)).fetchone()
+
+        if in_use['has_products'] or in_use['has_loadings']:
+            # Count only when the numbers are needed for the message
+            usage = db._execute(_QUERY_UNIT_USAGE_COUNTS, (id, id)).fetchone()
             flash(
                 f'Cannot delete "{unitname}": '
                 f'{usage["mapped_products"]} product mapping(s) and '
@@ -206,51 +224,34 @@ def view_usage(id):
         flash('Unit not found.', 'danger')
         return redirect(url_for('units.list_units'))
 
-    # Get products that this unit has loading records for (actual usage)
-    products_with_loading_query = '''
-        SELECT DISTINCT 
-            p.id, 
-            p.itemname,
-            COUNT(DISTINCT il.id) as loading_count
-        FROM items p
-        JOIN itemloading il ON p.id = il.fkproduct
-        WHERE il.fkitem = ?
-        GROUP BY p.id, p.itemname
-        ORDER BY p.itemname
-    '''
-    mapped_products = db._execute(products_with_loading_query, (id,)).fetchall()
-
-    # Get loading statistics with monthly breakdown
-    loading_query = '''
-        SELECT 
-            COUNT(*) as total_records,
-            SUM(percent) as total_percent,
-            COUNT(DISTINCT monthyear) as month_count
-        FROM itemloading
-        WHERE fkitem = ?
-    '''
-    loading_stats = db._execute(loading_query, (id,)).fetchone()
-
-    # Get detailed loading records for chart and table
-    loading_details_query = '''
-        SELECT 
-            il.monthyear,
-            CASE WHEN p.itemname IS NULL THEN 'UNALLOCATED' ELSE p.itemname END AS productname,
-            il.percent
-        FROM itemloading il
-        LEFT JOIN items p ON il.fkproduct = p.id
-        WHERE il.fkitem = ?
-        ORDER BY il.monthyear, p.itemname
-    '''
-    loading_details_rows = db._execute(loading_details_query, (id,)).fetchall()
-
-    # Convert Row objects to dictionaries for JSON serialization
-    loading_details = [dict(row) for row in loading_details_rows]
+    # One pass over the unit's loading records; the product list and the
+    # statistics are derived from the same rows the chart and table use
+    loading_details_rows = db._execute(_QUERY_USAGE_DETAILS, (id,)).fetchall()
+
+    # Products that this unit has loading records for (actual usage)
+    loading_counts = Counter(
+        row['fkproduct'] for row in loading_details_rows if row['fkproduct'] is not None
+    )
+    names_by_id = {row['fkproduct']: row['productname'] for row in loading_details_rows}
+    mapped_products = sorted(
+        (
+            {'id': product_id, 'itemname': names_by_id[product_id], 'loading_count': count}
+            for product_id, count in loading_counts.items()
+        ),
+        key=lambda product: product['itemname'],
+    )
+
+    # Loading statistics with monthly breakdown
+    loading_stats = {
+        'total_records': len(loading_details_rows),
+        'total_percent': sum(row['percent'] for row in loading_details_rows),
+        'month_count': len({row['monthyear'] for row in loading_details_rows}),
+    }
 
     return render_template(
         'units_usage.html',
         unit=unit,
         mapped_products=mapped_products,
         loading_stats=loading_stats,
-        loading_details=loading_details
+        loading_details=loading_details_rows
     )
\ No newline at end of file
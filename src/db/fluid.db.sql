@@ -5,7 +5,7 @@ CREATE TABLE IF NOT EXISTS "item_product_map" (
 	PRIMARY KEY("fkitem","fkproduct"),
 	FOREIGN KEY("fkitem") REFERENCES "items"("id") ON DELETE CASCADE ON UPDATE CASCADE,
 	FOREIGN KEY("fkproduct") REFERENCES "items"("id") ON DELETE CASCADE ON UPDATE CASCADE
-);
+) WITHOUT ROWID;
 CREATE TABLE IF NOT EXISTS "itemcharacteristics" (
 	"id"	INTEGER,
 	"fkitem"	INTEGER NOT NULL,
@@ -60,13 +60,37 @@ INSERT INTO "itemtypes" VALUES (3,'STATION');
 INSERT INTO "itemtypes" VALUES (4,'RESOURCE');
 INSERT INTO "itemtypes" VALUES (5,'UNIT');
 INSERT INTO "itemtypes" VALUES (6,'PRODUCT');
-CREATE INDEX IF NOT EXISTS "idx_item_product_map_fkproduct" ON "item_product_map" (
-	"fkproduct"
+CREATE INDEX IF NOT EXISTS "idx_item_product_map_fkproduct_fkitem" ON "item_product_map" (
+	"fkproduct",
+	"fkitem"
 );
 CREATE INDEX IF NOT EXISTS "idx_itemcharacteristics_fkitem" ON "itemcharacteristics" (
 	"fkitem"
 );
-CREATE INDEX IF NOT EXISTS "idx_itemloading_fkitem" ON "itemloading" (
-	"fkitem"
+CREATE INDEX IF NOT EXISTS "idx_itemloading_fkitem_monthyear_fkproduct_percent" ON "itemloading" (
+	"fkitem",
+	"monthyear",
+	"fkproduct",
+	"percent"
+);
+CREATE INDEX IF NOT EXISTS "idx_itemloading_fkproduct_monthyear_fkitem_percent" ON "itemloading" (
+	"fkproduct",
+	"monthyear",
+	"fkitem",
+	"percent"
+);
+CREATE INDEX IF NOT EXISTS "idx_itemloading_monthyear" ON "itemloading" (
+	"monthyear"
+);
+CREATE UNIQUE INDEX IF NOT EXISTS "idx_itemloading_item_month_product" ON "itemloading" (
+	"fkitem",
+	"monthyear",
+	IFNULL("fkproduct", 0)
+);
+CREATE INDEX IF NOT EXISTS "idx_items_fkitemtype" ON "items" (
+	"fkitemtype"
+);
+CREATE UNIQUE INDEX IF NOT EXISTS "idx_items_itemname" ON "items" (
+	"itemname"
 );
 COMMIT;
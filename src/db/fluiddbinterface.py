@@ -1,5 +1,187 @@
+import json
+import queue
 import sqlite3
-from typing import Optional, Dict, Any, Iterable, Tuple, List
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Optional, Dict, Any, Iterable, Iterator, Tuple, List
+
+
+# Itemtype ids keyed by (db path, typename). Itemtypes are effectively
+# immutable once created, so the ids are shared across per-request connections.
+_ITEMTYPE_IDS: Dict[Tuple[str, str], int] = {}
+
+# Whether a unique index ensure_indexes creates is present, keyed by
+# (db path, index name). Legacy duplicate rows can keep one from being
+# created; the writes that rely on it then take a lookup path instead.
+_UNIQUE_INDEXES: Dict[Tuple[str, str], bool] = {}
+
+
+# Per-item usage counters kept current by triggers, so the list pages read one
+# row per item instead of aggregating item_product_map/itemloading each time.
+# mapped_count/loading_count count rows where the item is fkitem;
+# product_mapped_count/product_loading_count count rows where it is fkproduct.
+_LOADING_SUMMARY_DDL = '''
+CREATE TABLE IF NOT EXISTS "loading_summary" (
+    "fkitem" INTEGER PRIMARY KEY,
+    "mapped_count" INTEGER NOT NULL DEFAULT 0,
+    "loading_count" INTEGER NOT NULL DEFAULT 0,
+    "product_mapped_count" INTEGER NOT NULL DEFAULT 0,
+    "product_loading_count" INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS "trg_item_product_map_summary_insert"
+AFTER INSERT ON "item_product_map" BEGIN
+    INSERT INTO "loading_summary" ("fkitem", "mapped_count") VALUES (NEW.fkitem, 1)
+        ON CONFLICT("fkitem") DO UPDATE SET "mapped_count" = "mapped_count" + 1;
+    INSERT INTO "loading_summary" ("fkitem", "product_mapped_count") VALUES (NEW.fkproduct, 1)
+        ON CONFLICT("fkitem") DO UPDATE SET "product_mapped_count" = "product_mapped_count" + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_item_product_map_summary_delete"
+AFTER DELETE ON "item_product_map" BEGIN
+    UPDATE "loading_summary" SET "mapped_count" = "mapped_count" - 1 WHERE "fkitem" = OLD.fkitem;
+    UPDATE "loading_summary" SET "product_mapped_count" = "product_mapped_count" - 1 WHERE "fkitem" = OLD.fkproduct;
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_item_product_map_summary_update"
+AFTER UPDATE OF "fkitem", "fkproduct" ON "item_product_map" BEGIN
+    UPDATE "loading_summary" SET "mapped_count" = "mapped_count" - 1 WHERE "fkitem" = OLD.fkitem;
+    UPDATE "loading_summary" SET "product_mapped_count" = "product_mapped_count" - 1 WHERE "fkitem" = OLD.fkproduct;
+    INSERT INTO "loading_summary" ("fkitem", "mapped_count") VALUES (NEW.fkitem, 1)
+        ON CONFLICT("fkitem") DO UPDATE SET "mapped_count" = "mapped_count" + 1;
+    INSERT INTO "loading_summary" ("fkitem", "product_mapped_count") VALUES (NEW.fkproduct, 1)
+        ON CONFLICT("fkitem") DO UPDATE SET "product_mapped_count" = "product_mapped_count" + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_itemloading_summary_insert"
+AFTER INSERT ON "itemloading" BEGIN
+    INSERT INTO "loading_summary" ("fkitem", "loading_count") VALUES (NEW.fkitem, 1)
+        ON CONFLICT("fkitem") DO UPDATE SET "loading_count" = "loading_count" + 1;
+    INSERT INTO "loading_summary" ("fkitem", "product_loading_count")
+        SELECT NEW.fkproduct, 1 WHERE NEW.fkproduct IS NOT NULL
+        ON CONFLICT("fkitem") DO UPDATE SET "product_loading_count" = "product_loading_count" + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_itemloading_summary_delete"
+AFTER DELETE ON "itemloading" BEGIN
+    UPDATE "loading_summary" SET "loading_count" = "loading_count" - 1 WHERE "fkitem" = OLD.fkitem;
+    UPDATE "loading_summary" SET "product_loading_count" = "product_loading_count" - 1 WHERE "fkitem" = OLD.fkproduct;
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_itemloading_summary_update"
+AFTER UPDATE OF "fkitem", "fkproduct" ON "itemloading" BEGIN
+    UPDATE "loading_summary" SET "loading_count" = "loading_count" - 1 WHERE "fkitem" = OLD.fkitem;
+    UPDATE "loading_summary" SET "product_loading_count" = "product_loading_count" - 1 WHERE "fkitem" = OLD.fkproduct;
+    INSERT INTO "loading_summary" ("fkitem", "loading_count") VALUES (NEW.fkitem, 1)
+        ON CONFLICT("fkitem") DO UPDATE SET "loading_count" = "loading_count" + 1;
+    INSERT INTO "loading_summary" ("fkitem", "product_loading_count")
+        SELECT NEW.fkproduct, 1 WHERE NEW.fkproduct IS NOT NULL
+        ON CONFLICT("fkitem") DO UPDATE SET "product_loading_count" = "product_loading_count" + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_items_summary_delete"
+AFTER DELETE ON "items" BEGIN
+    DELETE FROM "loading_summary" WHERE "fkitem" = OLD.id;
+END;
+'''
+
+
+# One row per (item, month, product); NULL fkproduct (UNALLOCATED) is folded
+# to 0 so it takes part in the unique index and the upsert conflict target.
+_UPSERT_LOADING_SQL = (
+    'INSERT INTO "itemloading" ("fkitem","dailyrollupexists","monthyear","percent","fkproduct") '
+    'VALUES (?,0,?,?,?) '
+    'ON CONFLICT ("fkitem", "monthyear", IFNULL("fkproduct", 0)) '
+    'DO UPDATE SET "percent" = excluded."percent";'
+)
+
+_UPSERT_PRODUCT_LOADING_SQL = (
+    'INSERT INTO "productloading" ("fkproduct","fkitemtype","monthyear","percent","notes") '
+    'VALUES (?,?,?,?,?) '
+    'ON CONFLICT ("fkproduct", "fkitemtype", "monthyear") '
+    'DO UPDATE SET "percent" = excluded."percent", "notes" = excluded."notes";'
+)
+
+_UPSERT_PRODUCT_REQUIREMENT_SQL = (
+    'INSERT INTO "productrequirements" ("fkproduct","fkitem","monthyear","percent","notes") '
+    'VALUES (?,?,?,?,?) '
+    'ON CONFLICT ("fkproduct", "fkitem", "monthyear") '
+    'DO UPDATE SET "percent" = excluded."percent", "notes" = excluded."notes" '
+    'RETURNING "id";'
+)
+
+
+# Per-connection settings, applied once when a connection is opened (pooled
+# connections keep them). WAL itself is persistent (see enable_wal); schema
+# indexes are created once at startup (see ensure_indexes).
+_CONNECTION_PRAGMAS = '''
+PRAGMA foreign_keys = ON;
+PRAGMA synchronous = NORMAL;
+PRAGMA temp_store = MEMORY;
+PRAGMA cache_size = -65536;
+PRAGMA mmap_size = 268435456;
+'''
+
+
+# Idle pooled connections keyed by db path (see VerificationDB(pooled=True)).
+# Each keeps its PRAGMAs and page cache between requests.
+_POOL_SIZE = 8
+_CONNECTION_POOLS: Dict[str, "queue.LifoQueue[sqlite3.Connection]"] = {}
+
+
+# Namedtuple classes keyed by cursor.description, so each result shape
+# builds its class once.
+_ROW_CLASSES: Dict[Tuple[Any, ...], Any] = {}
+
+
+def namedtuple_factory(cursor: sqlite3.Cursor, row: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    """Row factory returning namedtuples (row.column attribute access)."""
+    cls = _ROW_CLASSES.get(cursor.description)
+    if cls is None:
+        cls = _ROW_CLASSES.setdefault(
+            cursor.description, namedtuple('Row', [c[0] for c in cursor.description])
+        )
+    return cls(*row)
+
+
+@lru_cache(maxsize=128)
+def _update_sql(table: str, cols: Tuple[str, ...]) -> str:
+    """
+    'UPDATE "table" SET "col1" = ?, ... WHERE "id" = ?;' for a column tuple.
+    Built once per combination, so each combination always sends the same
+    text and hits the connection's statement cache.
+    """
+    set_clause = ", ".join(f'"{c}" = ?' for c in cols)
+    return f'UPDATE "{table}" SET {set_clause} WHERE "id" = ?;'
+
+
+@lru_cache(maxsize=128)
+def _select_ids_sql(table: str, id_col: str, cols: Tuple[str, ...]) -> str:
+    """'SELECT "id_col" FROM "table" WHERE "col1" = ? AND ...;', once per column tuple."""
+    if not cols:
+        return f'SELECT "{id_col}" FROM "{table}";'
+    where_sql = " AND ".join(f'"{c}" = ?' for c in cols)
+    return f'SELECT "{id_col}" FROM "{table}" WHERE {where_sql};'
+
+
+def ym_to_int(monthyear: str) -> int:
+    """Convert a 'YYYY-MM' string to an integer key YYYYMM."""
+    return int(monthyear[:4]) * 100 + int(monthyear[5:7])
+
+
+def int_to_ym(key: int) -> str:
+    """Convert an integer key YYYYMM back to a 'YYYY-MM' string."""
+    return f"{key // 100:04d}-{key % 100:02d}"
+
+
+class DuplicateItemNameError(sqlite3.IntegrityError):
+    """Raised by add_item/update_item when another item already has the name."""
+
+
+def _is_itemname_conflict(e: sqlite3.IntegrityError) -> bool:
+    """Whether an IntegrityError is the items.itemname unique index rejecting a name."""
+    return str(e).startswith("UNIQUE constraint failed: items.itemname")
 
 
 class VerificationDB:
@@ -13,11 +195,17 @@ class VerificationDB:
       - itemloading: id (PK), fkitem, dailyrollupexists, monthyear, percent, fkproduct (nullable)
       - item_product_map: fkitem, fkproduct (composite PK)
       - productloading: id (PK), fkproduct, fkitemtype, monthyear, percent, notes
+      - loading_summary: fkitem (PK), per-item mapping/loading counters (trigger-maintained)
     """
 
-    def __init__(self, path: str):
+    def __init__(self, path: str, pooled: bool = False):
         self.path = path
+        self.pooled = pooled
         self.con: Optional[sqlite3.Connection] = None
+        # Item rows and name -> id lookups read through this instance
+        # (one instance per request)
+        self._item_cache: Dict[int, sqlite3.Row] = {}
+        self._item_id_by_name_cache: Dict[str, int] = {}
 
     # ---------- Connection & context management ----------
 
@@ -34,33 +222,247 @@ class VerificationDB:
         self.close()
 
     def connect(self):
+        if self.con is None and self.pooled:
+            try:
+                self.con = _CONNECTION_POOLS[self.path].get_nowait()
+            except (KeyError, queue.Empty):
+                pass
         if self.con is None:
-            self.con = sqlite3.connect(self.path)
+            # Pooled connections may be handed to another request thread.
+            # timeout is SQLite's busy timeout: wait up to 5s on a locked write.
+            self.con = sqlite3.connect(
+                self.path,
+                timeout=5.0,
+                check_same_thread=not self.pooled,
+                cached_statements=512,
+            )
             self.con.row_factory = sqlite3.Row
-            self.con.execute("PRAGMA foreign_keys = ON;")
+            self.con.executescript(_CONNECTION_PRAGMAS)
 
     def close(self):
+        self._item_cache.clear()
+        self._item_id_by_name_cache.clear()
         if self.con is not None:
+            if self.pooled:
+                # Discard uncommitted work and park the connection for reuse
+                self.con.rollback()
+                pool = _CONNECTION_POOLS.get(self.path)
+                if pool is None:
+                    pool = _CONNECTION_POOLS.setdefault(self.path, queue.LifoQueue(_POOL_SIZE))
+                try:
+                    pool.put_nowait(self.con)
+                    self.con = None
+                    return
+                except queue.Full:
+                    pass
             self.con.close()
             self.con = None
 
+    @contextmanager
+    def transaction(self):
+        """
+        Run a block of writes as one BEGIN IMMEDIATE ... COMMIT, rolled back
+        if the block raises. The write lock is taken up front, so the block
+        never waits to upgrade a read lock halfway through. Inside an already
+        open transaction the block joins it and the outer owner commits.
+        """
+        self.connect()
+        if self.con.in_transaction:
+            yield self
+            return
+        self.con.execute("BEGIN IMMEDIATE;")
+        try:
+            yield self
+        except BaseException:
+            self.con.rollback()
+            raise
+        self.con.commit()
+
+    def enable_wal(self) -> str:
+        """
+        Switch the database file to WAL journaling so readers are not blocked
+        by a committing writer. The mode is stored in the file; returns it.
+        """
+        self.connect()
+        return self.con.execute("PRAGMA journal_mode = WAL;").fetchone()[0]
+
+    def ensure_indexes(self) -> List[str]:
+        """
+        Create the secondary indexes used by the list/usage queries (idempotent).
+        Returns the unique indexes that legacy duplicate rows kept from being
+        created; the writes relying on them use a lookup path instead.
+        """
+        self.connect()
+        for key in [k for k in _UNIQUE_INDEXES if k[0] == self.path]:
+            del _UNIQUE_INDEXES[key]
+        skipped = []
+        self.con.executescript(
+            'CREATE INDEX IF NOT EXISTS "idx_items_fkitemtype" ON "items" ("fkitemtype");'
+            # Product-side mirror of the (fkitem, fkproduct) primary key, so
+            # mapping lookups by product are answered from the index alone
+            'CREATE INDEX IF NOT EXISTS "idx_item_product_map_fkproduct_fkitem" '
+            'ON "item_product_map" ("fkproduct", "fkitem");'
+            # Covering indexes: item-side and product-side itemloading reads
+            # are answered from the index without touching the table
+            'CREATE INDEX IF NOT EXISTS "idx_itemloading_fkitem_monthyear_fkproduct_percent" '
+            'ON "itemloading" ("fkitem", "monthyear", "fkproduct", "percent");'
+            'CREATE INDEX IF NOT EXISTS "idx_itemloading_fkproduct_monthyear_fkitem_percent" '
+            'ON "itemloading" ("fkproduct", "monthyear", "fkitem", "percent");'
+            'CREATE INDEX IF NOT EXISTS "idx_itemloading_monthyear" ON "itemloading" ("monthyear");'
+            # Superseded by the covering indexes above (same leading column)
+            'DROP INDEX IF EXISTS "idx_itemloading_fkitem";'
+            'DROP INDEX IF EXISTS "idx_itemloading_fkproduct";'
+            'DROP INDEX IF EXISTS "idx_itemloading_fkproduct_monthyear_percent";'
+            'DROP INDEX IF EXISTS "idx_item_product_map_fkproduct";'
+        )
+        try:
+            # Backs the upsert_loading conflict target
+            self.con.execute(
+                'CREATE UNIQUE INDEX IF NOT EXISTS "idx_itemloading_item_month_product" '
+                'ON "itemloading" ("fkitem", "monthyear", IFNULL("fkproduct", 0));'
+            )
+        except sqlite3.IntegrityError:
+            # Legacy duplicate loadings: upsert_loading uses a lookup
+            skipped.append("idx_itemloading_item_month_product")
+        try:
+            # Item names are unique across types (exact match: products and
+            # stations are uppercased by their forms, resources and units keep
+            # the case they were entered with). Inserts/renames rely on this
+            # index to reject duplicates instead of probing by name first.
+            self.con.execute('CREATE UNIQUE INDEX IF NOT EXISTS "idx_items_itemname" ON "items" ("itemname");')
+        except sqlite3.IntegrityError:
+            # Legacy data with duplicate names: add_item/update_item probe this
+            # plain index instead (see has_unique_itemnames)
+            self.con.execute('CREATE INDEX IF NOT EXISTS "idx_items_itemname_lookup" ON "items" ("itemname");')
+            skipped.append("idx_items_itemname")
+        # Conflict targets for upsert_product_loading / upsert_product_requirement.
+        # With legacy duplicates the same columns get a plain index instead,
+        # which keeps the fallback lookup a single index probe.
+        for index_name, table, columns in (
+            ("idx_productloading_product_type_month", "productloading",
+             '"fkproduct", "fkitemtype", "monthyear"'),
+            ("idx_productrequirements_product_item_month", "productrequirements",
+             '"fkproduct", "fkitem", "monthyear"'),
+        ):
+            try:
+                self.con.execute(
+                    f'CREATE UNIQUE INDEX IF NOT EXISTS "{index_name}" ON "{table}" ({columns});'
+                )
+            except sqlite3.IntegrityError:
+                self.con.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{index_name}_lookup" ON "{table}" ({columns});'
+                )
+                skipped.append(index_name)
+            except sqlite3.OperationalError:
+                # Table not created in this database
+                pass
+        try:
+            # Month-filtered requirement reads (comparison, per-product list)
+            # range-scan one product-month and come back in month order
+            self.con.execute(
+                'CREATE INDEX IF NOT EXISTS "idx_productrequirements_product_month_item_percent" '
+                'ON "productrequirements" ("fkproduct", "monthyear", "fkitem", "percent");'
+            )
+        except sqlite3.OperationalError:
+            pass
+        return skipped
+
+    def ensure_loading_summary(self) -> None:
+        """
+        Create the loading_summary table and its triggers if missing.
+        The counters are rebuilt only when something had to be created;
+        otherwise the triggers have kept them current.
+        """
+        self.connect()
+        schema_sql = (
+            "SELECT COUNT(*) FROM sqlite_master WHERE "
+            "(type = 'table' AND name = 'loading_summary') OR "
+            "(type = 'trigger' AND name LIKE 'trg%summary%');"
+        )
+        before = self._execute_raw(schema_sql).fetchone()[0]
+        self.con.executescript(_LOADING_SUMMARY_DDL)
+        if self._execute_raw(schema_sql).fetchone()[0] != before:
+            self.rebuild_loading_summary()
+
+    def rebuild_loading_summary(self) -> None:
+        """Recount loading_summary from the source tables (maintenance; scans both)."""
+        self.connect()
+        self.con.executescript(
+            'BEGIN IMMEDIATE;'
+            'DELETE FROM "loading_summary";'
+            'INSERT INTO "loading_summary" '
+            '("fkitem","mapped_count","loading_count","product_mapped_count","product_loading_count") '
+            'SELECT i.id, '
+            '(SELECT COUNT(*) FROM "item_product_map" WHERE "fkitem" = i.id), '
+            '(SELECT COUNT(*) FROM "itemloading" WHERE "fkitem" = i.id), '
+            '(SELECT COUNT(*) FROM "item_product_map" WHERE "fkproduct" = i.id), '
+            '(SELECT COUNT(*) FROM "itemloading" WHERE "fkproduct" = i.id) '
+            'FROM "items" i;'
+            'COMMIT;'
+        )
+
     # ---------- Helpers ----------
 
+    def _has_unique_index(self, table: str, index_name: str) -> bool:
+        """Whether table has the named unique index (cached per db path)."""
+        key = (self.path, index_name)
+        unique = _UNIQUE_INDEXES.get(key)
+        if unique is None:
+            row = self._execute_raw(
+                'SELECT "unique" FROM pragma_index_list(?) WHERE "name" = ?;', (table, index_name)
+            ).fetchone()
+            unique = _UNIQUE_INDEXES[key] = bool(row and row[0])
+        return unique
+
     def _execute(self, sql: str, params: Tuple[Any, ...] = ()) -> sqlite3.Cursor:
         if self.con is None:
             self.connect()
         return self.con.execute(sql, params)
 
-    def _update_set_clause(self, data: Dict[str, Any]) -> Tuple[str, Tuple[Any, ...]]:
-        """Build a 'SET col1=?, col2=?' clause from a dict, skipping None values."""
+    def _execute_tuples(self, sql: str, params: Tuple[Any, ...] = ()) -> sqlite3.Cursor:
+        """Like _execute, but rows come back as namedtuples instead of sqlite3.Row."""
+        if self.con is None:
+            self.connect()
+        cur = self.con.cursor()
+        cur.row_factory = namedtuple_factory
+        return cur.execute(sql, params)
+
+    def _execute_raw(self, sql: str, params: Tuple[Any, ...] = ()) -> sqlite3.Cursor:
+        """Like _execute, but rows come back as plain tuples (no row wrapper)."""
+        if self.con is None:
+            self.connect()
+        cur = self.con.cursor()
+        cur.row_factory = None
+        return cur.execute(sql, params)
+
+    def _iter_rows(
+            self, sql: str, params: Tuple[Any, ...] = (), raw: bool = False
+    ) -> Iterator[Any]:
+        """Yield result rows in fetchmany batches instead of building a list."""
+        cur = (self._execute_raw if raw else self._execute)(sql, params)
+        cur.arraysize = 200
+        while True:
+            rows = cur.fetchmany()
+            if not rows:
+                return
+            yield from rows
+
+    def _execute_many(self, sql: str, seq_of_params: Iterable[Tuple[Any, ...]]) -> sqlite3.Cursor:
+        if self.con is None:
+            self.connect()
+        return self.con.executemany(sql, seq_of_params)
+
+    def _update_by_id(self, table: str, id: int, data: Dict[str, Any]) -> None:
+        """UPDATE one row by id from a dict of columns, skipping None values."""
         cols, vals = [], []
         for k, v in data.items():
             if v is not None:
-                cols.append(f'"{k}" = ?')
+                cols.append(k)
                 vals.append(v)
         if not cols:
             raise ValueError("No fields to update.")
-        return ", ".join(cols), tuple(vals)
+        vals.append(id)
+        self._execute(_update_sql(table, tuple(cols)), tuple(vals))
 
     def _indices_by_fields(
             self,
@@ -69,19 +471,16 @@ class VerificationDB:
             filters: Dict[str, Any],
     ) -> List[int]:
         """Generic: return list of ids for rows in table that match non-None filters."""
-        where_parts, params = [], []
+        cols, params = [], []
         for col, val in filters.items():
             if val is not None:
-                where_parts.append(f'"{col}" = ?')
+                cols.append(col)
                 params.append(val)
-        if not where_parts:
+        if not cols:
             raise ValueError("At least one filter must be provided.")
-        where_sql = " AND ".join(where_parts)
-        cur = self._execute(
-            f'SELECT "{id_col}" AS idx FROM "{table}" WHERE {where_sql};',
-            tuple(params),
-        )
-        return [int(r["idx"]) for r in cur.fetchall()]
+        cur = self._execute_raw(_select_ids_sql(table, id_col, tuple(cols)), tuple(params))
+        # INTEGER ids already come back as ints
+        return [row[0] for row in cur]
 
     # ====================================================
     # itemtypes
@@ -94,17 +493,43 @@ class VerificationDB:
 
     def update_itemtype(self, id: int, typename: Optional[str] = None) -> None:
         """Update itemtype by id."""
-        set_clause, params = self._update_set_clause({"typename": typename})
-        self._execute(f'UPDATE "itemtypes" SET {set_clause} WHERE "id" = ?;', params + (id,))
+        self._update_by_id("itemtypes", id, {"typename": typename})
+        self._clear_itemtype_id_cache()
 
     def delete_itemtype(self, id: int) -> None:
         """Delete itemtype by id."""
         self._execute('DELETE FROM "itemtypes" WHERE "id" = ?;', (id,))
+        self._clear_itemtype_id_cache()
+
+    def _clear_itemtype_id_cache(self) -> None:
+        """Forget cached itemtype ids for this database."""
+        for key in [k for k in _ITEMTYPE_IDS if k[0] == self.path]:
+            del _ITEMTYPE_IDS[key]
+
+    def get_or_create_itemtype_id(self, typename: str) -> int:
+        """
+        Return the id for an itemtype, creating it if missing.
+        Ids of existing types are cached; a freshly created id is not cached
+        until it has been seen by a later lookup (the insert may be rolled back).
+        """
+        type_id = self.get_itemtype_id_by_typename(typename)
+        if type_id:
+            return type_id
+        return self.add_itemtype(typename)
 
     def get_itemtype_id_by_typename(self, typename: str) -> Optional[int]:
-        """Return the id for an itemtype by typename."""
-        ids = self._indices_by_fields("itemtypes", "id", {"typename": typename})
-        return ids[0] if ids else None
+        """Return the id for an itemtype by typename (cached once found)."""
+        key = (self.path, typename)
+        type_id = _ITEMTYPE_IDS.get(key)
+        if type_id:
+            return type_id
+        row = self._execute_raw(
+            'SELECT "id" FROM "itemtypes" WHERE "typename" = ? LIMIT 1;', (typename,)
+        ).fetchone()
+        if row is None:
+            return None
+        _ITEMTYPE_IDS[key] = row[0]
+        return row[0]
 
     def get_itemtype_by_id(self, id: int) -> Optional[sqlite3.Row]:
         """Get itemtype row by id."""
@@ -115,12 +540,40 @@ class VerificationDB:
     # items
     # ====================================================
 
+    def has_unique_itemnames(self) -> bool:
+        """Whether the unique index on items.itemname exists (cached per path)."""
+        return self._has_unique_index("items", "idx_items_itemname")
+
+    def _check_itemname_free(self, itemname: str, id: Optional[int] = None) -> None:
+        """
+        Raise DuplicateItemNameError if another item already has itemname.
+        Only probes when the unique index is missing; otherwise the
+        INSERT/UPDATE itself rejects the name.
+        """
+        if self.has_unique_itemnames():
+            return
+        row = self._execute_raw(
+            'SELECT 1 FROM "items" WHERE "itemname" = ? AND "id" IS NOT ? LIMIT 1;', (itemname, id)
+        ).fetchone()
+        if row is not None:
+            raise DuplicateItemNameError(itemname)
+
     def add_item(self, itemname: str, fkitemtype: int) -> int:
-        """Insert item. Returns auto-generated id."""
-        cur = self._execute(
-            'INSERT INTO "items" ("itemname","fkitemtype") VALUES (?,?);',
-            (itemname, fkitemtype),
-        )
+        """
+        Insert item. Returns auto-generated id.
+        A taken name raises DuplicateItemNameError; other constraint
+        failures raise sqlite3.IntegrityError as usual.
+        """
+        self._check_itemname_free(itemname)
+        try:
+            cur = self._execute(
+                'INSERT INTO "items" ("itemname","fkitemtype") VALUES (?,?);',
+                (itemname, fkitemtype),
+            )
+        except sqlite3.IntegrityError as e:
+            if _is_itemname_conflict(e):
+                raise DuplicateItemNameError(itemname) from e
+            raise
         return cur.lastrowid
 
     def update_item(
@@ -129,19 +582,41 @@ class VerificationDB:
             itemname: Optional[str] = None,
             fkitemtype: Optional[int] = None,
     ) -> None:
-        """Update item by id."""
-        set_clause, params = self._update_set_clause(
-            {"itemname": itemname, "fkitemtype": fkitemtype}
-        )
-        self._execute(f'UPDATE "items" SET {set_clause} WHERE "id" = ?;', params + (id,))
+        """Update item by id. A taken name raises DuplicateItemNameError."""
+        if itemname is not None:
+            self._check_itemname_free(itemname, id)
+        try:
+            self._update_by_id("items", id, {"itemname": itemname, "fkitemtype": fkitemtype})
+        except sqlite3.IntegrityError as e:
+            if _is_itemname_conflict(e):
+                raise DuplicateItemNameError(itemname) from e
+            raise
+        self._item_cache.pop(id, None)
+        self._item_id_by_name_cache.clear()
 
     def delete_item(self, id: int) -> None:
         """Delete item by id."""
         self._execute('DELETE FROM "items" WHERE "id" = ?;', (id,))
+        self._item_cache.pop(id, None)
+        self._item_id_by_name_cache.clear()
 
     def get_item_by_id(self, id: int) -> Optional[sqlite3.Row]:
-        """Get item by id."""
-        cur = self._execute('SELECT * FROM "items" WHERE "id" = ?;', (id,))
+        """Get item by id (memoized for the life of this instance)."""
+        item = self._item_cache.get(id)
+        if item is None:
+            item = self._execute('SELECT * FROM "items" WHERE "id" = ?;', (id,)).fetchone()
+            if item is not None:
+                self._item_cache[id] = item
+        return item
+
+    def get_item_with_type(self, id: int) -> Optional[sqlite3.Row]:
+        """Get item by id together with its itemtype's typename."""
+        cur = self._execute(
+            'SELECT i.*, it.typename FROM "items" i '
+            'JOIN "itemtypes" it ON i.fkitemtype = it.id '
+            'WHERE i.id = ?;',
+            (id,),
+        )
         return cur.fetchone()
 
     def get_item_by_name(self, itemname: str) -> Optional[sqlite3.Row]:
@@ -150,9 +625,17 @@ class VerificationDB:
         return cur.fetchone()
 
     def get_item_id_by_name(self, itemname: str) -> Optional[int]:
-        """Return items.id for a given itemname."""
-        ids = self._indices_by_fields("items", "id", {"itemname": itemname})
-        return ids[0] if ids else None
+        """Return items.id for a given itemname (memoized once found)."""
+        item_id = self._item_id_by_name_cache.get(itemname)
+        if item_id is not None:
+            return item_id
+        row = self._execute_raw(
+            'SELECT "id" FROM "items" WHERE "itemname" = ? LIMIT 1;', (itemname,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._item_id_by_name_cache[itemname] = row[0]
+        return row[0]
 
     # ====================================================
     # itemcharacteristics
@@ -182,17 +665,15 @@ class VerificationDB:
             itemkeyvaluetype: Optional[str] = None,
     ) -> None:
         """Update itemcharacteristic by id."""
-        set_clause, params = self._update_set_clause(
+        self._update_by_id(
+            "itemcharacteristics",
+            id,
             {
                 "fkitem": fkitem,
                 "itemkey": itemkey,
                 "itemvalue": itemvalue,
                 "itemkeyvaluetype": itemkeyvaluetype,
-            }
-        )
-        self._execute(
-            f'UPDATE "itemcharacteristics" SET {set_clause} WHERE "id" = ?;',
-            params + (id,),
+            },
         )
 
     def delete_itemcharacteristic(self, id: int) -> None:
@@ -253,16 +734,17 @@ class VerificationDB:
             fkproduct: Optional[int] = None,
     ) -> None:
         """Update itemloading by id."""
-        set_clause, params = self._update_set_clause(
+        self._update_by_id(
+            "itemloading",
+            id,
             {
                 "fkitem": fkitem,
                 "dailyrollupexists": dailyrollupexists,
                 "monthyear": monthyear,
                 "percent": percent,
                 "fkproduct": fkproduct,
-            }
+            },
         )
-        self._execute(f'UPDATE "itemloading" SET {set_clause} WHERE "id" = ?;', params + (id,))
 
     def delete_loading(self, id: int) -> None:
         """Delete itemloading by id."""
@@ -281,19 +763,38 @@ class VerificationDB:
             fkproduct: Optional[int] = None
     ) -> None:
         """Insert or update loading percentage for item, month, and product."""
-        cur = self._execute(
-            'SELECT "id" FROM "itemloading" WHERE "fkitem" = ? AND "monthyear" = ? AND '
-            '("fkproduct" = ? OR ("fkproduct" IS NULL AND ? IS NULL));',
-            (fkitem, monthyear, fkproduct, fkproduct),
-        )
-        existing = cur.fetchone()
+        if self._has_unique_index("itemloading", "idx_itemloading_item_month_product"):
+            self._execute(_UPSERT_LOADING_SQL, (fkitem, monthyear, percent, fkproduct))
+        else:
+            # No unique loading index (legacy duplicates): look the row up first
+            self._upsert_loading_by_lookup(fkitem, monthyear, percent, fkproduct)
 
-        if existing:
-            self._execute(
-                'UPDATE "itemloading" SET "percent" = ? WHERE "id" = ?;',
-                (percent, existing["id"]),
-            )
+    def upsert_loadings_bulk(
+            self,
+            rows: Iterable[Tuple[int, str, float, Optional[int]]]
+    ) -> None:
+        """Upsert many (fkitem, monthyear, percent, fkproduct) rows in one executemany."""
+        if self._has_unique_index("itemloading", "idx_itemloading_item_month_product"):
+            self._execute_many(_UPSERT_LOADING_SQL, rows)
         else:
+            for row in rows:
+                self._upsert_loading_by_lookup(*row)
+
+    def _upsert_loading_by_lookup(
+            self,
+            fkitem: int,
+            monthyear: str,
+            percent: float,
+            fkproduct: Optional[int] = None
+    ) -> None:
+        # Update in place; insert only when no row matched.
+        # "IS ?" also matches NULL (UNALLOCATED) against a None fkproduct.
+        cur = self._execute(
+            'UPDATE "itemloading" SET "percent" = ? '
+            'WHERE "fkitem" = ? AND "monthyear" = ? AND "fkproduct" IS ?;',
+            (percent, fkitem, monthyear, fkproduct),
+        )
+        if cur.rowcount == 0:
             self.add_loading(fkitem, 0, monthyear, percent, fkproduct)
 
     def upsert_item_loading(
@@ -309,23 +810,31 @@ class VerificationDB:
     def get_loadings_for_items(
             self,
             item_ids: List[int]
-    ) -> Dict[Tuple[int, str, Optional[int]], float]:
-        """Return dict of (item_id, monthyear, product_id) -> percent for given items."""
+    ) -> Dict[Tuple[int, int, Optional[int]], float]:
+        """
+        Return dict of (item_id, monthyear, product_id) -> percent for given items.
+        monthyear keys are integers in YYYYMM form (see ym_to_int).
+        """
         if not item_ids:
             return {}
 
-        placeholders = ",".join("?" * len(item_ids))
-        cur = self._execute(
-            f'SELECT "fkitem", "monthyear", "fkproduct", "percent" FROM "itemloading" '
-            f'WHERE "fkitem" IN ({placeholders});',
-            tuple(item_ids),
+        # Ids go in as one JSON array parameter: the statement text is the
+        # same for any number of items and never hits the bound-variable limit.
+        # The YYYYMM key is computed by SQLite (same result as ym_to_int; the
+        # monthyear CHECK constraint guarantees the format), so the loop below
+        # only packs tuples.
+        cur = self._execute_raw(
+            'SELECT "fkitem", '
+            'CAST(substr("monthyear", 1, 4) AS INTEGER) * 100 + CAST(substr("monthyear", 6, 2) AS INTEGER), '
+            '"fkproduct", "percent" FROM "itemloading" '
+            'WHERE "fkitem" IN (SELECT "value" FROM json_each(?));',
+            (json.dumps([int(i) for i in item_ids]),),
         )
-
-        result = {}
-        for row in cur.fetchall():
-            key = (row["fkitem"], row["monthyear"], row["fkproduct"])
-            result[key] = row["percent"]
-        return result
+        # Single pass straight off the cursor
+        return {
+            (fkitem, month_key, fkproduct): percent
+            for fkitem, month_key, fkproduct, percent in cur
+        }
 
     def find_loading_ids(
             self,
@@ -357,6 +866,13 @@ class VerificationDB:
             (fkitem, fkproduct),
         )
 
+    def add_item_product_mappings_bulk(self, rows: Iterable[Tuple[int, int]]) -> None:
+        """Create many (fkitem, fkproduct) relationships in one executemany."""
+        self._execute_many(
+            'INSERT OR IGNORE INTO "item_product_map" ("fkitem", "fkproduct") VALUES (?, ?);',
+            rows,
+        )
+
     def remove_item_product_mapping(self, fkitem: int, fkproduct: int) -> None:
         """Remove item-product relationship."""
         self._execute(
@@ -406,42 +922,64 @@ class VerificationDB:
         )
         return cur.fetchall()
 
-    def list_characteristics_for_item(self, fkitem: int) -> Iterable[sqlite3.Row]:
+    def list_characteristics_for_item(self, fkitem: int) -> List[sqlite3.Row]:
         """Get all characteristics for an item."""
-        return self._execute(
+        return list(self.iter_characteristics_for_item(fkitem))
+
+    def iter_characteristics_for_item(self, fkitem: int) -> Iterator[sqlite3.Row]:
+        """Like list_characteristics_for_item, but streamed."""
+        return self._iter_rows(
             'SELECT * FROM "itemcharacteristics" WHERE "fkitem" = ? ORDER BY "id";', (fkitem,)
-        ).fetchall()
+        )
 
-    def list_loadings_for_item(self, fkitem: int) -> Iterable[sqlite3.Row]:
+    def list_loadings_for_item(self, fkitem: int) -> List[sqlite3.Row]:
         """Get all loadings for an item."""
-        return self._execute(
-            'SELECT * FROM "itemloading" WHERE "fkitem" = ? ORDER BY "monthyear";', (fkitem,)
-        ).fetchall()
+        return list(self.iter_loadings_for_item(fkitem))
+
+    def iter_loadings_for_item(self, fkitem: int, raw_rows: bool = False) -> Iterator[sqlite3.Row]:
+        """
+        Like list_loadings_for_item, but streamed.
+        raw_rows=True yields plain tuples
+        (id, fkitem, dailyrollupexists, monthyear, percent, fkproduct).
+        """
+        return self._iter_rows(
+            'SELECT "id", "fkitem", "dailyrollupexists", "monthyear", "percent", "fkproduct" '
+            'FROM "itemloading" WHERE "fkitem" = ? ORDER BY "monthyear";',
+            (fkitem,),
+            raw=raw_rows,
+        )
 
     def list_months(self) -> List[str]:
         """Return sorted list of distinct monthyear values from itemloading."""
-        cur = self._execute(
-            'SELECT DISTINCT "monthyear" FROM "itemloading" ORDER BY "monthyear";'
+        # Loose index scan: hop from one month to the next on
+        # idx_itemloading_monthyear instead of reading every loading row
+        cur = self._execute_raw(
+            'WITH RECURSIVE "months"("m") AS ('
+            ' SELECT MIN("monthyear") FROM "itemloading"'
+            ' UNION ALL'
+            ' SELECT (SELECT MIN("monthyear") FROM "itemloading" WHERE "monthyear" > "months"."m")'
+            ' FROM "months" WHERE "months"."m" IS NOT NULL'
+            ') SELECT "m" FROM "months" WHERE "m" IS NOT NULL;'
         )
-        return [row["monthyear"] for row in cur.fetchall()]
+        return [row[0] for row in cur]
 
     def generate_month_range(self, start_month: str, end_month: str) -> List[str]:
         """Generate list of months between start_month and end_month (YYYY-MM format)."""
-        from datetime import datetime
-        from dateutil import rrule
-
+        # Count months since year 0 and step with integers
         try:
-            start_date = datetime.strptime(start_month, '%Y-%m')
-            end_date = datetime.strptime(end_month, '%Y-%m')
-
-            months = []
-            for dt in rrule.rrule(rrule.MONTHLY, dtstart=start_date, until=end_date):
-                months.append(dt.strftime('%Y-%m'))
-
-            return months
-        except ValueError:
+            bounds = []
+            for monthyear in (start_month, end_month):
+                year, month = monthyear.split('-')
+                year, month = int(year), int(month)
+                if not (1 <= year <= 9999 and 1 <= month <= 12):
+                    return []
+                bounds.append(year * 12 + month - 1)
+        except (AttributeError, ValueError):
             return []
 
+        start, end = bounds
+        return [f'{m // 12:04d}-{m % 12 + 1:02d}' for m in range(start, end + 1)]
+
     # ====================================================
     # Convenience helpers
     # ====================================================
@@ -451,21 +989,21 @@ class VerificationDB:
         row = self.get_item_by_name(itemname)
         return int(row["id"]) if row else None
 
-    def get_or_create_unallocated_product(self) -> int:
-        """Get or create the UNALLOCATED product, return its id."""
-        # Get PRODUCT type id
-        product_type_id = self.get_itemtype_id_by_typename('PRODUCT')
-        if not product_type_id:
-            product_type_id = self.add_itemtype('PRODUCT')
-            self.con.commit()
-
+    def get_or_create_unallocated_product(self, commit: bool = False) -> int:
+        """
+        Get or create the UNALLOCATED product, return its id. The lookup is
+        memoized on this instance (see get_item_id_by_name), so it is read
+        from the database once per request.
+        Creation joins the caller's transaction; pass commit=True to commit it here.
+        """
         # Get or create UNALLOCATED product
-        unallocated = self.get_item_by_name('UNALLOCATED')
-        if unallocated:
-            return unallocated['id']
-
-        unallocated_id = self.add_item('UNALLOCATED', product_type_id)
-        self.con.commit()
+        unallocated_id = self.get_item_id_by_name('UNALLOCATED')
+        if not unallocated_id:
+            # Get PRODUCT type id
+            product_type_id = self.get_or_create_itemtype_id('PRODUCT')
+            unallocated_id = self.add_item('UNALLOCATED', product_type_id)
+            if commit:
+                self.con.commit()
         return unallocated_id
 
     # ====================================================
@@ -498,16 +1036,17 @@ class VerificationDB:
             notes: Optional[str] = None,
     ) -> None:
         """Update product loading by id."""
-        set_clause, params = self._update_set_clause(
+        self._update_by_id(
+            "productloading",
+            id,
             {
                 "fkproduct": fkproduct,
                 "fkitemtype": fkitemtype,
                 "monthyear": monthyear,
                 "percent": percent,
                 "notes": notes,
-            }
+            },
         )
-        self._execute(f'UPDATE "productloading" SET {set_clause} WHERE "id" = ?;', params + (id,))
 
     def delete_product_loading(self, id: int) -> None:
         """Delete product loading by id."""
@@ -527,28 +1066,43 @@ class VerificationDB:
             notes: Optional[str] = None
     ) -> None:
         """Insert or update product loading requirement for product, item type, and month."""
-        cur = self._execute(
-            'SELECT "id" FROM "productloading" WHERE "fkproduct" = ? AND "fkitemtype" = ? AND "monthyear" = ?;',
-            (fkproduct, fkitemtype, monthyear),
-        )
-        existing = cur.fetchone()
-
-        if existing:
+        if self._has_unique_index("productloading", "idx_productloading_product_type_month"):
             self._execute(
-                'UPDATE "productloading" SET "percent" = ?, "notes" = ? WHERE "id" = ?;',
-                (percent, notes, existing["id"]),
+                _UPSERT_PRODUCT_LOADING_SQL, (fkproduct, fkitemtype, monthyear, percent, notes)
             )
         else:
+            # No unique index on productloading: look the row up first
+            self._upsert_product_loading_by_lookup(fkproduct, fkitemtype, monthyear, percent, notes)
+
+    def _upsert_product_loading_by_lookup(
+            self,
+            fkproduct: int,
+            fkitemtype: int,
+            monthyear: str,
+            percent: float,
+            notes: Optional[str] = None
+    ) -> None:
+        # Update in place; insert only when no row matched
+        cur = self._execute(
+            'UPDATE "productloading" SET "percent" = ?, "notes" = ? '
+            'WHERE "fkproduct" = ? AND "fkitemtype" = ? AND "monthyear" = ?;',
+            (percent, notes, fkproduct, fkitemtype, monthyear),
+        )
+        if cur.rowcount == 0:
             self.add_product_loading(fkproduct, fkitemtype, monthyear, percent, notes)
 
-    def list_product_loadings_for_product(self, fkproduct: int) -> Iterable[sqlite3.Row]:
+    def list_product_loadings_for_product(self, fkproduct: int) -> List[sqlite3.Row]:
         """Get all loading requirements for a product."""
-        return self._execute(
+        return list(self.iter_product_loadings_for_product(fkproduct))
+
+    def iter_product_loadings_for_product(self, fkproduct: int) -> Iterator[sqlite3.Row]:
+        """Like list_product_loadings_for_product, but streamed."""
+        return self._iter_rows(
             'SELECT pl.*, it.typename FROM "productloading" pl '
             'JOIN "itemtypes" it ON pl.fkitemtype = it.id '
             'WHERE pl."fkproduct" = ? ORDER BY pl."monthyear", it.typename;',
             (fkproduct,)
-        ).fetchall()
+        )
 
     def get_product_loadings_for_month(self, monthyear: str) -> List[sqlite3.Row]:
         """Get all product loading requirements for a specific month."""
@@ -580,7 +1134,7 @@ class VerificationDB:
             },
         )
 
-    def list_product_requirements_for_product(self, product_id: int) -> list:
+    def list_product_requirements_for_product(self, product_id: int) -> List[sqlite3.Row]:
         """
         Get all requirements for a specific product.
         Returns list of requirements with item details.
@@ -589,9 +1143,13 @@ class VerificationDB:
             product_id: ID of the product
 
         Returns:
-            List of dicts with keys: id, fkproduct, fkitem, itemname, typename,
-                                      monthyear, percent, notes
+            List of rows with keys: id, fkproduct, fkitem, itemname, typename,
+                                    monthyear, percent, notes
         """
+        return list(self.iter_product_requirements_for_product(product_id))
+
+    def iter_product_requirements_for_product(self, product_id: int) -> Iterator[sqlite3.Row]:
+        """Like list_product_requirements_for_product, but streamed."""
         query = '''
             SELECT 
                 pr.id,
@@ -608,7 +1166,7 @@ class VerificationDB:
             WHERE pr.fkproduct = ?
             ORDER BY pr.monthyear, it.typename, i.itemname
         '''
-        return self._execute(query, (product_id,)).fetchall()
+        return self._iter_rows(query, (product_id,))
 
     def get_product_requirement(self, requirement_id: int) -> dict:
         """
@@ -674,35 +1232,17 @@ class VerificationDB:
             percent: New percentage (optional)
             notes: New notes (optional)
         """
-        updates = []
-        params = []
-
-        if fkproduct is not None:
-            updates.append('fkproduct = ?')
-            params.append(fkproduct)
-
-        if fkitem is not None:
-            updates.append('fkitem = ?')
-            params.append(fkitem)
-
-        if monthyear is not None:
-            updates.append('monthyear = ?')
-            params.append(monthyear)
-
-        if percent is not None:
-            updates.append('percent = ?')
-            params.append(percent)
-
-        if notes is not None:
-            updates.append('notes = ?')
-            params.append(notes)
-
-        if not updates:
+        data = {
+            'fkproduct': fkproduct,
+            'fkitem': fkitem,
+            'monthyear': monthyear,
+            'percent': percent,
+            'notes': notes,
+        }
+        if all(v is None for v in data.values()):
             return
 
-        params.append(requirement_id)
-        query = f"UPDATE productrequirements SET {', '.join(updates)} WHERE id = ?"
-        self._execute(query, tuple(params))
+        self._update_by_id('productrequirements', requirement_id, data)
 
     def delete_product_requirement(self, requirement_id: int) -> None:
         """
@@ -731,6 +1271,17 @@ class VerificationDB:
         Returns:
             ID of the requirement (existing or new)
         """
+        if self._has_unique_index("productrequirements", "idx_productrequirements_product_item_month"):
+            return self._execute(
+                _UPSERT_PRODUCT_REQUIREMENT_SQL, (fkproduct, fkitem, monthyear, percent, notes)
+            ).fetchone()[0]
+        # No unique index on productrequirements: look the row up first
+        return self._upsert_product_requirement_by_lookup(
+            fkproduct, fkitem, monthyear, percent, notes
+        )
+
+    def _upsert_product_requirement_by_lookup(self, fkproduct: int, fkitem: int, monthyear: str,
+                                              percent: float, notes: str = None) -> int:
         # Check if exists
         check_query = '''
             SELECT id FROM productrequirements
@@ -764,26 +1315,13 @@ class VerificationDB:
         Returns:
             List of requirement IDs
         """
-        where_clauses = []
-        params = []
-
-        if fkproduct is not None:
-            where_clauses.append('fkproduct = ?')
-            params.append(fkproduct)
+        filters = {'fkproduct': fkproduct, 'fkitem': fkitem, 'monthyear': monthyear}
+        cols = tuple(col for col, val in filters.items() if val is not None)
+        params = tuple(filters[col] for col in cols)
 
-        if fkitem is not None:
-            where_clauses.append('fkitem = ?')
-            params.append(fkitem)
-
-        if monthyear is not None:
-            where_clauses.append('monthyear = ?')
-            params.append(monthyear)
-
-        where_clause = ' AND '.join(where_clauses) if where_clauses else '1=1'
-        query = f'SELECT id FROM productrequirements WHERE {where_clause}'
-
-        results = self._execute(query, tuple(params)).fetchall()
-        return [row['id'] for row in results]
+        # No filters returns every requirement id
+        query = _select_ids_sql('productrequirements', 'id', cols)
+        return [row[0] for row in self._execute_raw(query, params)]
 
     def get_requirements_by_month(self, product_id: int, monthyear: str) -> list:
         """
@@ -853,85 +1391,77 @@ class VerificationDB:
               - gaps: List of items required but not allocated
               - excess: List of items allocated but not required
         """
-        # Get requirements
-        requirements_query = '''
-            SELECT 
-                pr.fkitem,
-                i.itemname,
-                it.typename,
-                pr.percent as required_percent
-            FROM productrequirements pr
-            JOIN items i ON pr.fkitem = i.id
-            JOIN itemtypes it ON i.fkitemtype = it.id
-            WHERE pr.fkproduct = ? AND pr.monthyear = ?
-        '''
-        requirements = self._execute(requirements_query, (product_id, monthyear)).fetchall()
-
-        # Get allocations
-        allocations_query = '''
-            SELECT 
-                il.fkitem,
+        # One statement: requirement rows joined to their allocation, plus
+        # allocations with no requirement (a FULL OUTER JOIN of the two sets).
+        # Gap and excess amounts are computed by SQLite.
+        query = '''
+            WITH r AS (
+                SELECT fkitem, percent FROM productrequirements
+                WHERE fkproduct = ? AND monthyear = ?
+            ),
+            a AS (
+                SELECT fkitem, percent FROM itemloading
+                WHERE fkproduct = ? AND monthyear = ?
+            ),
+            ra AS (
+                SELECT r.fkitem, r.percent AS required_percent, a.percent AS allocated_percent
+                FROM r LEFT JOIN a ON a.fkitem = r.fkitem
+                UNION ALL
+                SELECT a.fkitem, NULL, a.percent
+                FROM a WHERE a.fkitem NOT IN (SELECT fkitem FROM r)
+            )
+            SELECT
+                ra.fkitem,
                 i.itemname,
                 it.typename,
-                il.percent as allocated_percent
-            FROM itemloading il
-            JOIN items i ON il.fkitem = i.id
+                ra.required_percent,
+                ra.allocated_percent,
+                ra.required_percent - COALESCE(ra.allocated_percent, 0) AS gap_percent,
+                ra.allocated_percent - COALESCE(ra.required_percent, 0) AS excess_percent
+            FROM ra
+            JOIN items i ON ra.fkitem = i.id
             JOIN itemtypes it ON i.fkitemtype = it.id
-            WHERE il.fkproduct = ? AND il.monthyear = ?
+            ORDER BY ra.fkitem
         '''
-        allocations = self._execute(allocations_query, (product_id, monthyear)).fetchall()
-
-        # Convert to dicts for comparison
-        req_dict = {r['fkitem']: r for r in requirements}
-        alloc_dict = {a['fkitem']: a for a in allocations}
+        cur = self._execute_raw(query, (product_id, monthyear, product_id, monthyear))
 
-        # Find gaps (required but not allocated)
+        requirements = []
+        allocations = []
         gaps = []
-        for item_id, req in req_dict.items():
-            if item_id not in alloc_dict:
-                gaps.append({
-                    'fkitem': item_id,
-                    'itemname': req['itemname'],
-                    'typename': req['typename'],
-                    'required_percent': req['required_percent'],
-                    'allocated_percent': 0,
-                    'gap_percent': req['required_percent']
+        excess = []
+        for fkitem, itemname, typename, required, allocated, gap, excess_amt in cur:
+            if required is not None:
+                requirements.append({
+                    'fkitem': fkitem,
+                    'itemname': itemname,
+                    'typename': typename,
+                    'required_percent': required
                 })
-            else:
-                alloc = alloc_dict[item_id]
-                gap = req['required_percent'] - alloc['allocated_percent']
-                if gap > 0:
+                # Required but not allocated, or allocated short
+                if allocated is None or gap > 0:
                     gaps.append({
-                        'fkitem': item_id,
-                        'itemname': req['itemname'],
-                        'typename': req['typename'],
-                        'required_percent': req['required_percent'],
-                        'allocated_percent': alloc['allocated_percent'],
+                        'fkitem': fkitem,
+                        'itemname': itemname,
+                        'typename': typename,
+                        'required_percent': required,
+                        'allocated_percent': allocated or 0,
                         'gap_percent': gap
                     })
-
-        # Find excess (allocated but not required)
-        excess = []
-        for item_id, alloc in alloc_dict.items():
-            if item_id not in req_dict:
-                excess.append({
-                    'fkitem': item_id,
-                    'itemname': alloc['itemname'],
-                    'typename': alloc['typename'],
-                    'required_percent': 0,
-                    'allocated_percent': alloc['allocated_percent'],
-                    'excess_percent': alloc['allocated_percent']
+            if allocated is not None:
+                allocations.append({
+                    'fkitem': fkitem,
+                    'itemname': itemname,
+                    'typename': typename,
+                    'allocated_percent': allocated
                 })
-            else:
-                req = req_dict[item_id]
-                excess_amt = alloc['allocated_percent'] - req['required_percent']
-                if excess_amt > 0:
+                # Allocated but not required, or allocated over the requirement
+                if required is None or excess_amt > 0:
                     excess.append({
-                        'fkitem': item_id,
-                        'itemname': alloc['itemname'],
-                        'typename': alloc['typename'],
-                        'required_percent': req['required_percent'],
-                        'allocated_percent': alloc['allocated_percent'],
+                        'fkitem': fkitem,
+                        'itemname': itemname,
+                        'typename': typename,
+                        'required_percent': required or 0,
+                        'allocated_percent': allocated,
                         'excess_percent': excess_amt
                     })
 
@@ -0,0 +1,92 @@
+"""
+Migration script to rebuild item_product_map as a WITHOUT ROWID table.
+
+The mapping table has no columns besides its (fkitem, fkproduct) primary
+key, so storing rows in the primary-key B-tree drops the hidden rowid and
+the separate autoindex: item-side lookups read the table itself and the
+product-side index is (fkproduct, fkitem) plus nothing else.
+
+Run this once: python migrate_item_product_map.py
+"""
+import os
+import sqlite3
+
+from db.fluiddbinterface import VerificationDB
+
+# Path to your database
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'fluid.db')
+
+def migrate():
+    """Copy item_product_map into a WITHOUT ROWID table and swap it in."""
+
+    # Autocommit mode: the transaction below is opened and closed explicitly,
+    # so the DDL is covered by it as well
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'item_product_map'")
+        table_sql = cursor.fetchone()[0]
+
+        if 'WITHOUT ROWID' in table_sql.upper():
+            conn.rollback()
+            print("item_product_map is already a WITHOUT ROWID table.")
+            return
+
+        # Step 1: Create the new table with the same columns and constraints
+        # (dropping any copy left behind by an interrupted run)
+        cursor.execute('DROP TABLE IF EXISTS item_product_map_new')
+        cursor.execute('''
+            CREATE TABLE item_product_map_new (
+                fkitem INTEGER NOT NULL,
+                fkproduct INTEGER NOT NULL,
+                PRIMARY KEY(fkitem, fkproduct),
+                FOREIGN KEY(fkitem) REFERENCES items(id) ON DELETE CASCADE ON UPDATE CASCADE,
+                FOREIGN KEY(fkproduct) REFERENCES items(id) ON DELETE CASCADE ON UPDATE CASCADE
+            ) WITHOUT ROWID
+        ''')
+
+        # Step 2: Copy the mappings
+        cursor.execute('''
+            INSERT INTO item_product_map_new (fkitem, fkproduct)
+            SELECT fkitem, fkproduct FROM item_product_map
+        ''')
+        print(f"Copied {cursor.rowcount} mappings.")
+
+        # Step 3: Drop old table (its indexes and triggers go with it) and rename
+        cursor.execute('DROP TABLE item_product_map')
+        cursor.execute('ALTER TABLE item_product_map_new RENAME TO item_product_map')
+
+        conn.commit()
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Migration failed: {e}")
+        raise
+    finally:
+        conn.close()
+
+    # Step 4: Recreate the product-side index and the loading_summary triggers
+    with VerificationDB(DB_PATH) as db:
+        db.ensure_indexes()
+        db.ensure_loading_summary()
+
+    print("\n✅ Migration completed successfully!")
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("ITEM_PRODUCT_MAP MIGRATION: WITHOUT ROWID")
+    print("=" * 60)
+    print()
+
+    # Confirm before proceeding
+    response = input("This will modify your database. Backup recommended. Continue? (yes/no): ")
+    if response.lower() != 'yes':
+        print("Migration cancelled.")
+        exit(0)
+
+    migrate()